@@ -0,0 +1,29 @@
+"""
+Warms the Numba cache for hand_evaluator so the first hand of a game does not
+pay the JIT compile time. Run once after installing or updating the project:
+
+    python _precompile.py
+
+Every compiled function uses cache=True, so the machine code written here is
+reused by later runs until hand_evaluator.py changes.
+"""
+import time
+import numpy as np
+from deuces import Card, Deck
+from hand_evaluator import simulate_showdowns, enumerate_showdowns
+
+def precompile():
+    ai_hand = [Card.new('As'), Card.new('Kd')]
+    board = [Card.new('Qh'), Card.new('Jc'), Card.new('2s'), Card.new('7d'), Card.new('9h')]
+    deck = np.array([c for c in Deck.GetFullDeck() if c not in ai_hand + board], dtype=np.int32)
+
+    start = time.time()
+    # Flop: Monte Carlo path
+    simulate_showdowns(ai_hand, np.array(board[:3], dtype=np.int32), deck, 10, 0, 3500)
+    # Turn and river: exact enumeration paths
+    enumerate_showdowns(ai_hand, np.array(board[:4], dtype=np.int32), deck, 3500)
+    enumerate_showdowns(ai_hand, np.array(board, dtype=np.int32), deck, 3500)
+    print(f"Numba functions compiled and cached in {time.time() - start:.1f}s")
+
+if __name__ == "__main__":
+    precompile()
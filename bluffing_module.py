@@ -1,7 +1,10 @@
 import random 
-from opponent_modeling import OpponentModel
+from opponent_modeling import shared_model
 
-def should_bluff(ai_hand_strength, pot_size, stage, aggression_level=0.9):
+# How much each betting stage adds to the bluff chance
+STAGE_WEIGHT = {'Pre-Flop': 0.2, 'Flop': 0.3, 'Turn': 0.4, 'River': 0.5}
+
+def should_bluff(ai_hand_strength, pot_size, stage, aggression_level=0.9, playstyle=None):
     """
     Determines if AI should bluff based on hand strength and game context.
 
@@ -10,6 +13,7 @@ def should_bluff(ai_hand_strength, pot_size, stage, aggression_level=0.9):
         pot_size (int): Total pot value.
         stage (str): One of 'Pre-Flop', 'Flop', 'Turn', 'River'.
         aggression_level (float): Base probability to bluff with a weak hand.
+        playstyle (str): Opponent playstyle if already predicted; looked up when None.
 
     Returns:
         bool: True if bluffing, False otherwise.
@@ -29,9 +33,9 @@ def should_bluff(ai_hand_strength, pot_size, stage, aggression_level=0.9):
     # → Function returns True → AI should bluff
     --------------------
     """
-    player_id = 1
-    opponent_model = OpponentModel()
-    playstyle = opponent_model.predict_playstyle(player_id)
+    if playstyle is None:
+        player_id = 1
+        playstyle = shared_model().predict_playstyle(player_id)
 
     # Adjust aggression based on playstyle
     if playstyle == 'passive' or playstyle == 'tight':
@@ -40,10 +44,9 @@ def should_bluff(ai_hand_strength, pot_size, stage, aggression_level=0.9):
         aggression_level *= 0.8  # Bluff less often
 
     is_weak_hand = ai_hand_strength > 6000
-    stage_weight = {'Pre-Flop': 0.2, 'Flop': 0.3, 'Turn': 0.4, 'River': 0.5}
-    
+
     pot_factor = min(pot_size / 100.0, 1.0)
-    stage_factor = stage_weight.get(stage, 0.3)
+    stage_factor = STAGE_WEIGHT.get(stage, 0.3)
 
     bluff_chance = aggression_level * (pot_factor + stage_factor)
     return is_weak_hand and random.random() < bluff_chance
\ No newline at end of file
@@ -1,8 +1,12 @@
-from deuces import Card, Deck, Evaluator
+from deuces import Card, Deck
+import atexit
+import functools
 import random
+import numpy as np
 from bluffing_module import should_bluff
+from hand_evaluator import simulate_showdowns, enumerate_showdowns
 import os
-from opponent_modeling import OpponentModel
+from opponent_modeling import shared_model, _EVALUATOR
 
 # Get the absolute path to the directory this script is in
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -14,36 +18,81 @@ bluff_stats = {
     "failed_bluffs": 0
 }
 
+# Bluff log lines waiting to be written to ai_bluff_log.txt
+BLUFF_LOG_PATH = os.path.join(SCRIPT_DIR, "ai_bluff_log.txt")
+BLUFF_LOG_FLUSH_EVERY = 1000
+_BLUFF_BUFFER = []
+
+# Writes every buffered bluff log line in one go
+def _flush_bluff_log():
+    if not _BLUFF_BUFFER:
+        return
+    with open(BLUFF_LOG_PATH, "a", encoding="utf-8") as log:
+        log.writelines(_BLUFF_BUFFER)
+    _BLUFF_BUFFER.clear()
+
+atexit.register(_flush_bluff_log)
+
+# Queues a bluff log line, flushing to disk once enough have built up
+def _log_bluff(line):
+    _BLUFF_BUFFER.append(line)
+    if len(_BLUFF_BUFFER) >= BLUFF_LOG_FLUSH_EVERY:
+        _flush_bluff_log()
+
+# Opponent hands ranked below this (strong pairs and better) count as strong
+STRONG_OPP_RANK = 3500
+
+# Shared random generator used to seed each Monte Carlo run
+_RNG = np.random.default_rng()
+
+# Round number the cached playstyle predictions are keyed on
+_round_id = 0
+
+# Marks the start of a new hand so playstyle predictions are refreshed once per hand
+def start_round():
+    global _round_id
+    _round_id += 1
+
+# Predicts the opponent's playstyle at most once per player per hand
+@functools.lru_cache(maxsize=16)
+def _cached_playstyle(player_id, round_id):
+    return shared_model().predict_playstyle(player_id)
+
+# Display string for every Deuces card int (e.g., Card.new('Ks') -> 'K♠'), and the reverse
+SUIT_SYMBOLS = {'s': '♠', 'h': '♥', 'd': '♦', 'c': '♣'}
+CARD_STRINGS = {Card.new(rank + suit): rank + symbol
+                for rank in Card.STR_RANKS for suit, symbol in SUIT_SYMBOLS.items()}
+CARD_INTS = {card_str: card for card, card_str in CARD_STRINGS.items()}
+
 # Converts human-readable card strings to Deuces format (e.g., 'K♠' -> 'Ks')
 def convert_card(card_str):
-    rank_map = {'T': 'T', 'J': 'J', 'Q': 'Q', 'K': 'K', 'A': 'A'}
-    rank_map.update({str(i): str(i) for i in range(2, 10)})
-    suit_map = {'♠': 's', '♥': 'h', '♦': 'd', '♣': 'c'}
-    return Card.new(rank_map[card_str[0]] + suit_map[card_str[1]])
+    return CARD_INTS[card_str]
 
 # Converts a list of card strings to Deuces card objects
 def convert_hand(hand):
-    return [convert_card(card) for card in hand]
+    return [CARD_INTS[card] for card in hand]
+
+# Converts Deuces card ints back to human-readable strings for printing and logs
+def hand_to_str(hand):
+    return [CARD_STRINGS[card] for card in hand]
 
 # Evaluates the strength of a hand against the board using Deuces
 # Returns an integer value: lower is better
 def evaluate_strength(hand, board):
-    evaluator = Evaluator()
+    evaluator = _EVALUATOR
     if len(board) + len(hand) < 5:
         return 7462  # Worst possible score when not enough cards
     return evaluator.evaluate(board, hand)
 
 # Converts a score to a human-readable hand rank string
 def rank_to_string(score):
-    evaluator = Evaluator()
+    evaluator = _EVALUATOR
     return evaluator.class_to_string(evaluator.get_rank_class(score))
 
 # Determines a fixed AI bet amount based on its hand strength
 # Stronger hands yield higher bets
 def determine_ai_bet_amount(ai_hand, community_cards):
-    board = convert_hand(community_cards)
-    hand = convert_hand(ai_hand)
-    score = evaluate_strength(hand, board)
+    score = evaluate_strength(ai_hand, community_cards)
     if score < 2000:
         return 50
     elif score < 4000:
@@ -53,17 +102,21 @@ def determine_ai_bet_amount(ai_hand, community_cards):
 # Estimates pre-flop hand strength using simple heuristics
 # Uses pairing, suitedness, and proximity to rank value
 def estimate_preflop_strength(hand):
-    ranks = {'2': 2, '3': 3, '4': 4, '5': 5, '6': 6, '7': 7,
-             '8': 8, '9': 9, 'T': 10, 'J': 11, 'Q': 12, 'K': 13, 'A': 14}
-    r1, s1 = hand[0][0], hand[0][1]
-    r2, s2 = hand[1][0], hand[1][1]
-    v1, v2 = ranks[r1], ranks[r2]
-    base = max(v1, v2) * 2
-    if r1 == r2:
+    # Deuces rank ints run 0 ('2') to 12 ('A'); shift them to face values 2-14
+    v1, v2 = Card.get_rank_int(hand[0]) + 2, Card.get_rank_int(hand[1]) + 2
+    suited = Card.get_suit_int(hand[0]) == Card.get_suit_int(hand[1])
+    return _preflop_strength(max(v1, v2), min(v1, v2), suited)
+
+# Scores a starting hand from its normalized (high rank, low rank, suited) form
+# Only 169 distinct starting hands exist, so every score is computed just once
+@functools.lru_cache(maxsize=256)
+def _preflop_strength(high, low, suited):
+    base = high * 2
+    if high == low:
         base += 30
-    if s1 == s2:
+    if suited:
         base += 10
-    if abs(v1 - v2) == 1:
+    if high - low == 1:
         base += 5
     return min(base, 100)
 
@@ -71,69 +124,59 @@ def estimate_preflop_strength(hand):
 Simulates many possible future outcomes to estimate AI win rate post-flop.
 This method randomly draws opponent hands and completes the board to see how often
 AI wins versus a random opponent hand, helping inform post-flop decision making.
+The same simulations also give the tie rate and the win rate against only the
+strong opponent hands (Deuces rank below STRONG_OPP_RANK).
 
 Parameters:
-    ai_hand (list[str]): AI's hand as list of card strings.
-    board (list[str]): Community cards on the table.
+    ai_hand (list[int]): AI's hand as Deuces card ints.
+    board (list[int]): Community cards on the table as Deuces card ints.
     num_simulations (int): How many Monte Carlo runs to perform.
 
 Returns:
-    float: AI win rate (0 to 1) based on simulated hands.
+    tuple[float, float, float]: AI win rate, tie rate, and win rate against
+    strong opponent hands (each 0 to 1) based on simulated hands.
 
 --------------------
 # Simplified Example:
 
-ai_hand = ['A♠', 'Q♠']
-board = ['K♦', 'J♣', '2♥']
+ai_hand = convert_hand(['A♠', 'Q♠'])
+board = convert_hand(['K♦', 'J♣', '2♥'])
 num_simulations = 1000
 
 # For each simulation:
 # 1. Draw two random cards for opponent (player)
 # 2. Draw 2 more community cards to complete the 5-card board
 # 3. Evaluate both hands using Deuces
-# 4. Track how many times AI wins
+# 4. Track how many times AI wins or ties, and how it does when the opponent is strong
 
-If AI wins 680 out of 1000 simulations,
-Return value: 0.68
+If AI wins 680 and ties 20 out of 1000 simulations,
+and wins 90 of the 250 where the opponent's hand was strong,
+Return value: (0.68, 0.02, 0.36)
 --------------------
 """
 def monte_carlo_win_rate(ai_hand, board, num_simulations=1000):
-    deck = Deck()
-    ai_converted = convert_hand(ai_hand)
-    board_converted = convert_hand(board)
-
-    # Remove known cards (AI's hand + board) from the deck
-    for card in ai_converted + board_converted:
-        if card in deck.cards:
-            deck.cards.remove(card)
-
-    wins = 0
-    ties = 0
-    evaluator = Evaluator()
-
-    for _ in range(num_simulations):
-        # Draw a random opponent hand from the remaining deck
-        opp_hand = [deck.draw(), deck.draw()]
-
-        # Build a full 5-card board
-        remaining_board = list(board_converted)
-        while len(remaining_board) < 5:
-            remaining_board.append(deck.draw())
-
-        # Evaluate AI and opponent hands against the same board
-        ai_score = evaluator.evaluate(remaining_board, ai_converted)
-        opp_score = evaluator.evaluate(remaining_board, opp_hand)
-
-        if ai_score < opp_score:
-            wins += 1
-        elif ai_score == opp_score:
-            ties += 1
-
-        # Return used cards back to the deck for the next simulation
-        deck.cards += opp_hand + [c for c in remaining_board if c not in board_converted]
-        random.shuffle(deck.cards)
-
-    return wins / num_simulations
+    # Simulate every hand in the compiled evaluator, split across CPU threads
+    wins, ties, strong, strong_wins = simulate_showdowns(
+        ai_hand, np.array(board, dtype=np.int32), remaining_deck(ai_hand, board),
+        num_simulations, int(_RNG.integers(1 << 32)), STRONG_OPP_RANK)
+    return _win_rates(num_simulations, wins, ties, strong, strong_wins)
+
+# Exact win rates on the turn or river, checking every river card (turn only)
+# against every possible opponent hand instead of sampling
+# Returns the same (win_rate, tie_rate, strong_win_rate) tuple as monte_carlo_win_rate
+def exact_win_rate(ai_hand, board):
+    return _win_rates(*enumerate_showdowns(ai_hand, np.array(board, dtype=np.int32),
+                                           remaining_deck(ai_hand, board), STRONG_OPP_RANK))
+
+# Cards left once the AI's hand and the board are removed, as an int32 array
+def remaining_deck(ai_hand, board):
+    known = set(ai_hand + board)
+    return np.array([c for c in Deck.GetFullDeck() if c not in known], dtype=np.int32)
+
+# Turns showdown counts into (win_rate, tie_rate, strong_win_rate)
+def _win_rates(total, wins, ties, strong, strong_wins):
+    strong_win_rate = strong_wins / strong if strong else 0.0
+    return wins / total, ties / total, strong_win_rate
 
 """
 Determines the AI's betting behavior based on hand strength, game stage,
@@ -141,8 +184,8 @@ player action, and bluffing strategy. This is the central logic that decides
 whether the AI will check, call, bet, raise, or fold at any given point.
 
 Parameters:
-    ai_hand (list[str]): AI's hand in string format.
-    community_cards (list[str]): Shared board cards.
+    ai_hand (list[int]): AI's hand as Deuces card ints.
+    community_cards (list[int]): Shared board cards as Deuces card ints.
     player_action (str): Player's last action ('check', 'bet', etc).
     pot_size (int): Total value of the pot.
     stage (str): Game stage ('Flop', 'Turn', 'River').
@@ -154,29 +197,23 @@ Returns:
 --------------------
 # Simplified Example:
 
-ai_hand = ['7♣', '2♦']
-community_cards = ['K♠', '9♦', '4♣']
+ai_hand = convert_hand(['7♣', '2♦'])
+community_cards = convert_hand(['K♠', '9♦', '4♣'])
 player_action = 'bet'
 pot_size = 60
 stage = 'Flop'
 last_player_bet = 20
 
-# Step 1: Run Monte Carlo to estimate win_rate (e.g., 0.18)
+# Step 1: Run Monte Carlo to estimate win_rate (e.g., 0.18); turn/river use exact odds
 # Step 2: Since win_rate < 0.75, check if AI should bluff
 # Step 3: Call should_bluff → returns True
 # Step 4: AI chooses to raise (bluff) to 30
 # Function returns: ('raise', 30)
 --------------------
 """
-from opponent_modeling import OpponentModel
-
 def make_ai_decision(ai_hand, community_cards, player_action, pot_size=0, stage="Flop", last_player_bet=20):
-    evaluator = Evaluator()
-    board = convert_hand(community_cards)
-    hand = convert_hand(ai_hand)
-    opponent_model = OpponentModel()
     player_id = 1  # Assuming player_id is 1 for the human player
-    playstyle = opponent_model.predict_playstyle(player_id)
+    playstyle = _cached_playstyle(player_id, _round_id)
 
     # Adjust thresholds based on playstyle
     win_rate_threshold = 0.75
@@ -204,9 +241,7 @@ def make_ai_decision(ai_hand, community_cards, player_action, pot_size=0, stage=
                 print("DEBUG: Pre-flop aggression — AI chooses to bet.")
                 bluff_stats["total_bluffs"] += 1
                 bluff_stats["successful_bluffs"] += 1
-                log_path = os.path.join(SCRIPT_DIR, "ai_bluff_log.txt")
-                with open(log_path, "a", encoding="utf-8") as log:
-                    log.write(f"Bluff on Pre-Flop: AI Hand = {ai_hand}, Player checked, Score = {score}\n")
+                _log_bluff(f"Bluff on Pre-Flop: AI Hand = {hand_to_str(ai_hand)}, Player checked, Score = {score}\n")
                 return ('bet', 20)
             return ('check', 0)
         else:
@@ -214,22 +249,26 @@ def make_ai_decision(ai_hand, community_cards, player_action, pot_size=0, stage=
                 return ('fold', 0)
             return ('call', 0)
 
-    # --- Post-Flop Logic with Monte Carlo ---
-    win_rate = monte_carlo_win_rate(ai_hand, community_cards)
-    print(f"DEBUG: Monte Carlo estimated win rate = {win_rate:.2f}")
+    # --- Post-Flop Logic: exact odds on the turn and river, Monte Carlo on the flop ---
+    if len(community_cards) >= 4:
+        win_rate, tie_rate, strong_win_rate = exact_win_rate(ai_hand, community_cards)
+        source = "Exact"
+    else:
+        win_rate, tie_rate, strong_win_rate = monte_carlo_win_rate(ai_hand, community_cards)
+        source = "Monte Carlo estimated"
+    print(f"DEBUG: {source} win rate = {win_rate:.2f} "
+          f"(tie rate = {tie_rate:.2f}, vs strong hands = {strong_win_rate:.2f})")
 
     if player_action == 'check':
         if win_rate > win_rate_threshold:
             return ('check', 0)
         elif win_rate > 0.4:
             return random.choice([('check', 0), ('bet', 30)])
-        elif should_bluff(7000, pot_size, stage, aggression_level=bluff_aggression):
+        elif should_bluff(7000, pot_size, stage, aggression_level=bluff_aggression, playstyle=playstyle):
             print("DEBUG: AI decided to bluff after check.")
             bluff_stats["total_bluffs"] += 1
             bluff_stats["successful_bluffs"] += 1
-            log_path = os.path.join(SCRIPT_DIR, "ai_bluff_log.txt")
-            with open(log_path, "a", encoding="utf-8") as log:
-                log.write(f"Bluff after player check on {stage}: AI Hand = {ai_hand}, Pot = {pot_size}\n")
+            _log_bluff(f"Bluff after player check on {stage}: AI Hand = {hand_to_str(ai_hand)}, Pot = {pot_size}\n")
             return ('bet', 30)
         else:
             return ('check', 0)
@@ -237,13 +276,11 @@ def make_ai_decision(ai_hand, community_cards, player_action, pot_size=0, stage=
     elif player_action == 'bet':
         if win_rate > win_rate_threshold:
             return ('call', 0)
-        elif should_bluff(7000, pot_size, stage, aggression_level=bluff_aggression):
+        elif should_bluff(7000, pot_size, stage, aggression_level=bluff_aggression, playstyle=playstyle):
             bluff_raise = max(int(last_player_bet * 1.5), int(pot_size * 0.1), 10)
             print(f"DEBUG: Player bet detected. AI decides to bluff (raise to {bluff_raise}).")
             bluff_stats["total_bluffs"] += 1
-            log_path = os.path.join(SCRIPT_DIR, "ai_bluff_log.txt")
-            with open(log_path, "a", encoding="utf-8") as log:
-                log.write(f"Bluff in response to player bet on {stage}: AI Hand = {ai_hand}, Pot = {pot_size}, Raise = {bluff_raise}\n")
+            _log_bluff(f"Bluff in response to player bet on {stage}: AI Hand = {hand_to_str(ai_hand)}, Pot = {pot_size}, Raise = {bluff_raise}\n")
             return ('raise', bluff_raise)
         else:
             return ('fold', 0)
@@ -0,0 +1,249 @@
+import itertools
+import numpy as np
+from numba import njit, prange, get_num_threads
+from deuces import Card
+from deuces.lookup import LookupTable
+
+# Worst possible Deuces rank (7-high), used as the starting point for "best of" searches
+WORST_RANK = LookupTable.MAX_HIGH_CARD
+
+# Card positions of each of the 21 five-card subsets of a seven-card hand
+IDX75 = np.array(list(itertools.combinations(range(7), 5)), dtype=np.int8)
+
+# Hash table size for the 4888 non-flush prime products (kept about 30% full)
+UNSUITED_SLOTS = 1 << 14
+
+# Starting hash slot of a prime product (Fibonacci hashing)
+@njit(cache=True, fastmath=True)
+def _unsuited_slot(prime_product):
+    return ((prime_product * 0x9E3779B1) >> 16) & (UNSUITED_SLOTS - 1)
+
+# Builds the two Cactus Kev tables from Deuces once at import time:
+#  - flush ranks indexed directly by the 13-bit rank mask of the five cards
+#  - non-flush ranks keyed by the product of the five rank primes, stored as an
+#    open-addressing hash table: a row of products over a row of ranks
+#    (plain arrays keep every compiled function cacheable, unlike a typed Dict)
+def _build_lookup_tables():
+    table = LookupTable()
+
+    flush_lookup = np.zeros(1 << 13, dtype=np.int32)
+    for rankbits in range(1 << 13):
+        if bin(rankbits).count('1') == 5:
+            flush_lookup[rankbits] = table.flush_lookup[Card.prime_product_from_rankbits(rankbits)]
+
+    unsuited_lookup = np.zeros((2, UNSUITED_SLOTS), dtype=np.int64)
+    for prime_product, rank in table.unsuited_lookup.items():
+        slot = _unsuited_slot(prime_product)
+        while unsuited_lookup[0, slot]:
+            slot = (slot + 1) & (UNSUITED_SLOTS - 1)
+        unsuited_lookup[0, slot] = prime_product
+        unsuited_lookup[1, slot] = rank
+
+    return flush_lookup, unsuited_lookup
+
+FLUSH_LOOKUP, UNSUITED_LOOKUP = _build_lookup_tables()
+
+# Ranks five Deuces card ints (1 = royal flush, 7462 = worst high card)
+# Flushes share a suit bit; everything else is identified by its rank-prime product.
+# A product missing from the table (duplicate or invalid cards) ends the probe at
+# an empty slot, and the probe never runs longer than the table
+@njit(cache=True, fastmath=True)
+def eval5(c0, c1, c2, c3, c4, flush_lookup, unsuited_lookup):
+    if c0 & c1 & c2 & c3 & c4 & 0xF000:
+        return flush_lookup[(c0 | c1 | c2 | c3 | c4) >> 16]
+    prime_product = (c0 & 0xFF) * (c1 & 0xFF) * (c2 & 0xFF) * (c3 & 0xFF) * (c4 & 0xFF)
+    slot = _unsuited_slot(prime_product)
+    for _ in range(UNSUITED_SLOTS):
+        stored = unsuited_lookup[0, slot]
+        if stored == prime_product:
+            return unsuited_lookup[1, slot]
+        if stored == 0:
+            break
+        slot = (slot + 1) & (UNSUITED_SLOTS - 1)
+    raise ValueError("Cards do not form a valid five-card hand")
+
+# Ranks the best five-card hand out of seven cards by checking all 21 subsets
+@njit(cache=True, fastmath=True)
+def eval7(cards, flush_lookup, unsuited_lookup):
+    best = WORST_RANK
+    for k in range(IDX75.shape[0]):
+        rank = eval5(cards[IDX75[k, 0]], cards[IDX75[k, 1]], cards[IDX75[k, 2]],
+                     cards[IDX75[k, 3]], cards[IDX75[k, 4]], flush_lookup, unsuited_lookup)
+        if rank < best:
+            best = rank
+    return best
+
+# Plays out one chunk of simulations: draw the opponent's two cards and the rest
+# of the board, then score both hands, also tallying the simulations where the
+# opponent's hand ranks better than strong_rank. On the river the AI's seven
+# cards are all known, so its hand is scored once up front. Only the cards
+# actually needed are drawn, by swapping a random card into each of the first
+# positions of the deck, so no full reshuffle is needed between simulations
+@njit(cache=True, fastmath=True)
+def _simulate_chunk(ai0, ai1, board, deck, num_simulations, seed, strong_rank,
+                    flush_lookup, unsuited_lookup):
+    np.random.seed(seed)
+    num_board = board.size
+    ai_cards = np.empty(7, dtype=np.int32)
+    opp_cards = np.empty(7, dtype=np.int32)
+    ai_cards[:num_board] = board
+    opp_cards[:num_board] = board
+    ai_cards[5] = ai0
+    ai_cards[6] = ai1
+
+    num_draws = 2 + 5 - num_board
+    ai_score = eval7(ai_cards, flush_lookup, unsuited_lookup) if num_board == 5 else WORST_RANK
+    wins = 0
+    ties = 0
+    strong = 0
+    strong_wins = 0
+    for _ in range(num_simulations):
+        for j in range(num_draws):
+            k = np.random.randint(j, deck.size)
+            deck[j], deck[k] = deck[k], deck[j]
+        opp_cards[5] = deck[0]
+        opp_cards[6] = deck[1]
+        for i in range(num_board, 5):
+            ai_cards[i] = deck[i - num_board + 2]
+            opp_cards[i] = deck[i - num_board + 2]
+
+        if num_board < 5:
+            ai_score = eval7(ai_cards, flush_lookup, unsuited_lookup)
+        opp_score = eval7(opp_cards, flush_lookup, unsuited_lookup)
+        if ai_score < opp_score:
+            wins += 1
+        elif ai_score == opp_score:
+            ties += 1
+        if opp_score < strong_rank:
+            strong += 1
+            if ai_score < opp_score:
+                strong_wins += 1
+
+    return wins, ties, strong, strong_wins
+
+# Runs the chunks across threads; each chunk works on its own copy of the deck
+# with its own random stream (seed + chunk index)
+@njit(cache=True, fastmath=True, parallel=True)
+def _simulate_parallel(ai0, ai1, board, deck, num_simulations, seed, strong_rank, num_chunks,
+                       flush_lookup, unsuited_lookup):
+    # One row of (wins, ties, strong opponent hands, wins against them) per chunk
+    counts = np.zeros((num_chunks, 4), dtype=np.int64)
+
+    for chunk in prange(num_chunks):
+        start = chunk * num_simulations // num_chunks
+        stop = (chunk + 1) * num_simulations // num_chunks
+        counts[chunk, 0], counts[chunk, 1], counts[chunk, 2], counts[chunk, 3] = _simulate_chunk(
+            ai0, ai1, board, deck.copy(), stop - start, seed + chunk, strong_rank,
+            flush_lookup, unsuited_lookup)
+
+    totals = counts.sum(axis=0)
+    return totals[0], totals[1], totals[2], totals[3]
+
+"""
+Monte Carlo showdowns behind decision_engine.monte_carlo_win_rate.
+The simulations are split into one chunk per Numba thread and run in parallel.
+
+Parameters:
+    ai_hand (list[int]): AI hole cards as Deuces ints.
+    board (np.ndarray[int32]): Known community cards.
+    deck (np.ndarray[int32]): Cards not in the AI hand or on the board.
+    num_simulations (int): How many hands to simulate.
+    seed (int): Base seed for this run's random streams.
+    strong_rank (int): Opponent hands ranked below this count as strong.
+
+Returns:
+    tuple[int, int, int, int]: AI wins, ties, strong opponent hands seen,
+    and AI wins against those strong hands.
+"""
+def simulate_showdowns(ai_hand, board, deck, num_simulations, seed, strong_rank):
+    num_chunks = max(min(get_num_threads(), num_simulations), 1)
+    return _simulate_parallel(ai_hand[0], ai_hand[1], board, deck, num_simulations, seed,
+                              strong_rank, num_chunks, FLUSH_LOOKUP, UNSUITED_LOOKUP)
+
+# Scores every opponent hole-card pair left in the deck against a complete board,
+# optionally leaving out the deck card at index skip (the river card on the turn)
+@njit(cache=True, fastmath=True)
+def _enumerate_opponents(ai_score, board, deck, skip, strong_rank, flush_lookup, unsuited_lookup):
+    opp_cards = np.empty(7, dtype=np.int32)
+    opp_cards[:5] = board
+
+    hands = 0
+    wins = 0
+    ties = 0
+    strong = 0
+    strong_wins = 0
+    for i in range(deck.size):
+        if i == skip:
+            continue
+        opp_cards[5] = deck[i]
+        for j in range(i + 1, deck.size):
+            if j == skip:
+                continue
+            opp_cards[6] = deck[j]
+            opp_score = eval7(opp_cards, flush_lookup, unsuited_lookup)
+            hands += 1
+            if ai_score < opp_score:
+                wins += 1
+            elif ai_score == opp_score:
+                ties += 1
+            if opp_score < strong_rank:
+                strong += 1
+                if ai_score < opp_score:
+                    strong_wins += 1
+
+    return hands, wins, ties, strong, strong_wins
+
+# On the river: the board is complete, so every opponent hand is checked exactly
+@njit(cache=True, fastmath=True)
+def _enumerate_river(ai0, ai1, board, deck, strong_rank, flush_lookup, unsuited_lookup):
+    ai_cards = np.empty(7, dtype=np.int32)
+    ai_cards[:5] = board
+    ai_cards[5] = ai0
+    ai_cards[6] = ai1
+    ai_score = eval7(ai_cards, flush_lookup, unsuited_lookup)
+    return _enumerate_opponents(ai_score, board, deck, -1, strong_rank, flush_lookup, unsuited_lookup)
+
+# On the turn: every possible river card (in parallel), then every opponent hand
+@njit(cache=True, fastmath=True, parallel=True)
+def _enumerate_turn(ai0, ai1, board, deck, strong_rank, flush_lookup, unsuited_lookup):
+    # One row of (hands, wins, ties, strong opponent hands, wins against them) per river card
+    counts = np.zeros((deck.size, 5), dtype=np.int64)
+
+    for river in prange(deck.size):
+        full_board = np.empty(5, dtype=np.int32)
+        full_board[:4] = board
+        full_board[4] = deck[river]
+        ai_cards = np.empty(7, dtype=np.int32)
+        ai_cards[:5] = full_board
+        ai_cards[5] = ai0
+        ai_cards[6] = ai1
+        ai_score = eval7(ai_cards, flush_lookup, unsuited_lookup)
+        counts[river, 0], counts[river, 1], counts[river, 2], counts[river, 3], counts[river, 4] = \
+            _enumerate_opponents(ai_score, full_board, deck, river, strong_rank,
+                                 flush_lookup, unsuited_lookup)
+
+    totals = counts.sum(axis=0)
+    return totals[0], totals[1], totals[2], totals[3], totals[4]
+
+"""
+Exact showdown counts on the turn or river, by enumerating every remaining
+river card (turn only) and every opponent hole-card pair instead of sampling.
+
+Parameters:
+    ai_hand (list[int]): AI hole cards as Deuces ints.
+    board (np.ndarray[int32]): Community cards; 4 (turn) or 5 (river) of them.
+    deck (np.ndarray[int32]): Cards not in the AI hand or on the board.
+    strong_rank (int): Opponent hands ranked below this count as strong.
+
+Returns:
+    tuple[int, int, int, int, int]: Showdowns checked, AI wins, ties, strong
+    opponent hands seen, and AI wins against those strong hands.
+"""
+def enumerate_showdowns(ai_hand, board, deck, strong_rank):
+    if board.size == 5:
+        return _enumerate_river(ai_hand[0], ai_hand[1], board, deck, strong_rank,
+                                FLUSH_LOOKUP, UNSUITED_LOOKUP)
+    if board.size == 4:
+        return _enumerate_turn(ai_hand[0], ai_hand[1], board, deck, strong_rank,
+                               FLUSH_LOOKUP, UNSUITED_LOOKUP)
+    raise ValueError("Exact enumeration needs a turn or river board (4 or 5 cards)")
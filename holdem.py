@@ -1,20 +1,19 @@
-from deuces import Card, Deck, Evaluator
-import random
-from bluffing_module import should_bluff
-from decision_engine import make_ai_decision, convert_hand, determine_ai_bet_amount, evaluate_strength, bluff_stats
-from opponent_modeling import OpponentModel
-
-# Define card suits and ranks for deck creation
-suits = ['♠', '♥', '♦', '♣']
+from deuces import Card
+import numpy as np
+from decision_engine import make_ai_decision, start_round, hand_to_str, bluff_stats
+from opponent_modeling import shared_model, _EVALUATOR
+
+# Define card suits and ranks for deck creation (Deuces notation)
+suits = ['s', 'h', 'd', 'c']
 ranks = ['2', '3', '4', '5', '6', '7', '8', '9', 'T', 'J', 'Q', 'K', 'A']
 
-# Create a standard 52-card deck
-def create_deck():
-    return [rank + suit for suit in suits for rank in ranks]
+# Standard 52-card deck of Deuces card ints, and the generator used to shuffle it
+_CARD_INTS = np.array([Card.new(rank + suit) for suit in suits for rank in ranks], dtype=np.int32)
+_RNG = np.random.default_rng()
 
-# Shuffle the given deck
-def shuffle_deck(deck):
-    random.shuffle(deck)
+# Create a shuffled standard 52-card deck (one NumPy permutation, as plain ints)
+def create_deck():
+    return _RNG.permutation(_CARD_INTS).tolist()
 
 # Deal a hand of n cards from the deck
 def deal_hand(deck, num_cards=2):
@@ -50,8 +49,8 @@ def player_decision():
 # Handle a single round of betting between player and AI
 def betting_round(player_hand, ai_hand, community_cards, pot, stage):
     print(f"\n--- {stage} Betting Round ---")
-    print(f"Community Cards: {community_cards}")
-    print(f"Your Hand: {player_hand}")
+    print(f"Community Cards: {hand_to_str(community_cards)}")
+    print(f"Your Hand: {hand_to_str(player_hand)}")
     print(f"Current Pot: {pot} chips")
 
     player_action = player_decision()
@@ -126,18 +125,14 @@ def betting_round(player_hand, ai_hand, community_cards, pot, stage):
 
 # Compare hands and declare a winner
 def showdown(player_hand, ai_hand, community_cards, pot):
-    evaluator = Evaluator()
-    p1 = convert_hand(player_hand)
-    p2 = convert_hand(ai_hand)
-    board = convert_hand(community_cards)
-
-    p1_score = evaluator.evaluate(board, p1)
-    p2_score = evaluator.evaluate(board, p2)
+    evaluator = _EVALUATOR
+    p1_score = evaluator.evaluate(community_cards, player_hand)
+    p2_score = evaluator.evaluate(community_cards, ai_hand)
 
     print("\n--- Showdown ---")
-    print(f"\nYour Hand: {player_hand}")
-    print(f"AI Hand: {ai_hand}")
-    print(f"Board: {community_cards}")
+    print(f"\nYour Hand: {hand_to_str(player_hand)}")
+    print(f"AI Hand: {hand_to_str(ai_hand)}")
+    print(f"Board: {hand_to_str(community_cards)}")
     print(f"Final Pot: {pot} chips")
     print(f"Your Hand Rank: {evaluator.class_to_string(evaluator.get_rank_class(p1_score))}")
     print(f"AI Hand Rank: {evaluator.class_to_string(evaluator.get_rank_class(p2_score))}")
@@ -150,48 +145,53 @@ def showdown(player_hand, ai_hand, community_cards, pot):
         print("It's a tie!")
 
 # Play through a single round of Texas Hold'em
-from opponent_modeling import OpponentModel
-
 def play_round():
-    # Initialize opponent model
-    opponent_model = OpponentModel()
+    start_round()
+
+    # Shared opponent model (the same one the AI predicts playstyles from)
+    opponent_model = shared_model()
     player_id = 1  # Define a player ID
     deck = create_deck()
-    shuffle_deck(deck)
 
     pot = 0
     player_hand = deal_hand(deck)
     ai_hand = deal_hand(deck)
+    # The opponent model logs card strings; the player's hand only needs converting once
+    player_hand_str = hand_to_str(player_hand)
 
     # Pre-flop betting
     state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, [], pot, "Pre-Flop")
-    opponent_model.update_opponent_data(player_hand, [], "Pre-Flop", player_action, player_bet, pot, player_id)
+    opponent_model.update_opponent_data(player_hand_str, [], "Pre-Flop", player_action, player_bet, pot, player_id)
     if state != 'continue':
         return
 
     # Flop betting
-    flop = deal_flop(deck)
-    state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, flop, pot, "Flop")
-    opponent_model.update_opponent_data(player_hand, flop, "Flop", player_action, player_bet, pot, player_id)
+    community_cards = deal_flop(deck)
+    community_str = hand_to_str(community_cards)
+    state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, community_cards, pot, "Flop")
+    opponent_model.update_opponent_data(player_hand_str, community_str, "Flop", player_action, player_bet, pot, player_id)
     if state != 'continue':
         return
 
     # Turn betting
     turn = deal_turn(deck)
-    state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, flop + [turn], pot, "Turn")
-    opponent_model.update_opponent_data(player_hand, flop + [turn], "Turn", player_action, player_bet, pot, player_id)
+    community_cards = community_cards + [turn]
+    community_str = community_str + hand_to_str([turn])
+    state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, community_cards, pot, "Turn")
+    opponent_model.update_opponent_data(player_hand_str, community_str, "Turn", player_action, player_bet, pot, player_id)
     if state != 'continue':
         return
 
     # River betting
     river = deal_river(deck)
-    state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, flop + [turn, river], pot, "River")
-    opponent_model.update_opponent_data(player_hand, flop + [turn, river], "River", player_action, player_bet, pot, player_id)
+    community_cards = community_cards + [river]
+    community_str = community_str + hand_to_str([river])
+    state, pot, player_action, player_bet = betting_round(player_hand, ai_hand, community_cards, pot, "River")
+    opponent_model.update_opponent_data(player_hand_str, community_str, "River", player_action, player_bet, pot, player_id)
     if state != 'continue':
         return
 
     # Final hand comparison
-    community_cards = flop + [turn, river]
     showdown(player_hand, ai_hand, community_cards, pot)
 
     # Display bluff statistics
@@ -1,6 +1,15 @@
-import pandas as pd
 import numpy as np
 import csv
+import itertools
+
+# Card ranks and suits used to build random two-card hands
+RANKS = ['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2']
+SUITS = ['♠', '♣', '♥', '♦']
+
+# Number of mock hands generated for each player
+HANDS_PER_PLAYER = 50
+
+_RNG = np.random.default_rng()
 
 def create_mock_data():
     # Define player styles and their characteristics
@@ -22,38 +31,42 @@ def create_mock_data():
         }
     }
 
-    mock_data = []
-    for player_id, style in player_styles.items():
-        # Generate 20 hands per player
-        for _ in range(50):
-            hand = f"{np.random.choice(['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2'])}" + \
-                   f"{np.random.choice(['♠', '♣', '♥', '♦'])}" + \
-                   f"{np.random.choice(['A', 'K', 'Q', 'J', '10', '9', '8', '7', '6', '5', '4', '3', '2'])}" + \
-                   f"{np.random.choice(['♠', '♣', '♥', '♦'])}"
-            
-            row = {
-                'hand': hand,
-                'flop': '',
-                'result1': '',
-                'turn': '',
-                'result2': '',
-                'river': '',
-                'result3': '',
-                'player_id': player_id,
-                'playstyle_label': style['style'],
-                'action_flop': np.random.choice(style['actions']),
-                'bet_size_flop': np.random.choice(style['bet_sizes']),
-                'action_turn': np.random.choice(style['actions']),
-                'bet_size_turn': np.random.choice(style['bet_sizes']),
-                'action_river': np.random.choice(style['actions']),
-                'bet_size_river': np.random.choice(style['bet_sizes'])
-            }
-            mock_data.append(row)
-
-    # Create DataFrame and save to CSV
-    df = pd.DataFrame(mock_data)
-    df.to_csv('opponent_dataset.csv', mode='a', header=False, index=False, quoting=csv.QUOTE_NONNUMERIC)
-    print(f"Added {len(mock_data)} mock hands to opponent_dataset.csv")
+    # Draw every column for all players at once; each player's rows are contiguous
+    num_hands = HANDS_PER_PLAYER * len(player_styles)
+    ranks = _RNG.choice(RANKS, size=(num_hands, 2))
+    suits = _RNG.choice(SUITS, size=(num_hands, 2))
+    hands = np.char.add(np.char.add(ranks[:, 0], suits[:, 0]), np.char.add(ranks[:, 1], suits[:, 1]))
+
+    def per_player(key):
+        return np.concatenate([_RNG.choice(style[key], size=HANDS_PER_PLAYER)
+                               for style in player_styles.values()])
+
+    columns = {
+        'hand': hands,
+        'flop': '',
+        'result1': '',
+        'turn': '',
+        'result2': '',
+        'river': '',
+        'result3': '',
+        'player_id': np.repeat(list(player_styles), HANDS_PER_PLAYER),
+        'playstyle_label': np.repeat([style['style'] for style in player_styles.values()], HANDS_PER_PLAYER),
+        'action_flop': per_player('actions'),
+        'bet_size_flop': per_player('bet_sizes'),
+        'action_turn': per_player('actions'),
+        'bet_size_turn': per_player('bet_sizes'),
+        'action_river': per_player('actions'),
+        'bet_size_river': per_player('bet_sizes')
+    }
+
+    # Append the rows straight from the columns; tolist() yields plain Python
+    # ints/floats so QUOTE_NONNUMERIC leaves the numeric columns unquoted, and
+    # the constant columns are repeated lazily rather than materialized
+    rows = zip(*(col.tolist() if isinstance(col, np.ndarray) else itertools.repeat(col, num_hands)
+                 for col in columns.values()))
+    with open('opponent_dataset.csv', 'a', newline='', encoding='utf-8') as f:
+        csv.writer(f, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n').writerows(rows)
+    print(f"Added {num_hands} mock hands to opponent_dataset.csv")
 
 if __name__ == "__main__":
     create_mock_data()
\ No newline at end of file
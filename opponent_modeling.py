@@ -4,104 +4,243 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import LabelEncoder
 import os
 import csv
+import bisect
+import functools
+import weakref
 from collections import defaultdict
 from deuces import Evaluator, Card
 
+# Appended CSV rows are flushed to disk in batches of this many
+CSV_FLUSH_EVERY = 64
+
+# Hand strength categories, indexed by the code _rank_to_strength returns,
+# and the worst Deuces rank that still falls in each category
+STRENGTH_NAMES = ('ROYAL FLUSH', 'STRAIGHT FLUSH', 'FOUR OF A KIND', 'FULL HOUSE', 'FLUSH',
+                  'STRAIGHT', 'THREE OF A KIND', 'TWO PAIR', 'PAIR', 'NOTHING')
+_STRENGTH_BOUNDS = (1, 10, 166, 322, 1599, 1609, 2467, 3325, 6185, 7462)
+PAIR = STRENGTH_NAMES.index('PAIR')
+NOTHING = STRENGTH_NAMES.index('NOTHING')
+
+# Strength code for each text a dataset's result columns may hold: the codes
+# themselves, and the names older CSVs stored instead (any case, 'High Card' too)
+_STRENGTH_CODES = {name: code for code, name in enumerate(STRENGTH_NAMES)}
+_STRENGTH_CODES['HIGH CARD'] = NOTHING
+_STRENGTH_CODES.update({str(code): code for code in range(len(STRENGTH_NAMES))})
+
+# Player actions are stored as small int codes; '' (no action) is NO_ACTION and
+# anything unrecognized shares the code after the known actions
+ACTION_CODES = {'fold': 0, 'call': 1, 'raise': 2, 'bet': 3, 'check': 4}
+NO_ACTION = -1
+OTHER_ACTION = len(ACTION_CODES)
+
+# Dataset action columns are categoricals over the same actions ('' for no action);
+# values outside the categories are kept as 'other' actions and 'unknown' playstyles
+ACTION_DTYPE = pd.CategoricalDtype(['', *ACTION_CODES, 'other'])
+UNKNOWN_PLAYSTYLE = 'unknown'
+_CATEGORY_FALLBACKS = {'action_flop': 'other', 'action_turn': 'other', 'action_river': 'other',
+                       'playstyle_label': UNKNOWN_PLAYSTYLE}
+
+# Deuces suit letter by suit glyph code point, and Deuces rank by rank character
+# ('1' starts '10')
+_SUIT_TBL = {ord('♣'): 'c', ord('♥'): 'h', ord('♦'): 'd', ord('♠'): 's'}
+_RANK_TBL = {c: c for c in '23456789TJQKA'}
+_RANK_TBL['1'] = 'T'
+
+# The one Deuces evaluator, also used by decision_engine and holdem
+# (each Evaluator() rebuilds its lookup tables)
+_EVALUATOR = Evaluator()
+
+@functools.lru_cache(maxsize=1 << 16)
+def _evaluate(board, hole_cards):
+    """Deuces rank of sorted hole-card and board tuples, cached across hands."""
+    return _EVALUATOR.evaluate(list(board), list(hole_cards))
+
 class OpponentModel:
     def __init__(self, data_path="poker_dataset.csv", min_hands_for_ml=50):
         """Initialize the opponent model with data storage and ML setup."""
         self.data_path = data_path
+        self.labels_path = data_path + '.labels'  # Labels applied since the CSV was last rewritten
         self.min_hands_for_ml = min_hands_for_ml
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.label_encoder = LabelEncoder()
-        self.opponent_data = defaultdict(list)  # Store raw hand/action data
+        # Running per-player totals behind compute_features, updated with every logged row
+        self.opponent_agg = defaultdict(lambda: {'act': [0] * (OTHER_ACTION + 1), 'bet_sum': 0.0, 'bet_n': 0,
+                                                 'weak': 0, 'weak_agg': 0, 'weak_river': 0, 'hands': 0})
         self.opponent_features = {}  # Store computed features
+        self._feat_cache = {}  # player_id -> (hands count, features) from the last compute_features
+        self._hand_rank_cache = {}  # Sorted hole cards -> (board so far, strength code per street)
         self.opponent_hands_count = defaultdict(int)  # Track hands per opponent
         self.playstyle_labels = ['aggressive', 'passive', 'tight', 'loose']
-        self.evaluator = Evaluator()  # Deuces hand evaluator
+        self.evaluator = _EVALUATOR  # Deuces hand evaluator
+        self._pending_rows = []  # Every dataset row, materialized into self.data on demand
+        self._label_dirty = True  # Labels changed since the last fit
+        self._trained = False
+
+        # Deuces int for every card string, in both the suit-first ('♣K') form and the
+        # rank-first ('K♣', '10♣') form used by the game and the datasets
+        suit_map = {'♣': 'c', '♥': 'h', '♦': 'd', '♠': 's'}
+        rank_map = {r: r for r in '23456789TJQKA'}
+        rank_map['10'] = 'T'
+        self._card_lut = {}
+        for suit, deuces_suit in suit_map.items():
+            for rank, deuces_rank in rank_map.items():
+                card_int = Card.new(deuces_rank + deuces_suit)
+                self._card_lut[suit + rank] = card_int
+                self._card_lut[rank + suit] = card_int
         
         # Define dtypes for CSV columns
         self.dtypes = {
             'hand': pd.StringDtype(),
             'flop': pd.StringDtype(),
-            'result1': pd.StringDtype(),
+            'result1': pd.Int8Dtype(),
             'turn': pd.StringDtype(),
-            'result2': pd.StringDtype(),
+            'result2': pd.Int8Dtype(),
             'river': pd.StringDtype(),
-            'result3': pd.StringDtype(),
-            'player_id': pd.Int64Dtype(),
-            'playstyle_label': pd.StringDtype(),
-            'action_flop': pd.StringDtype(),
-            'bet_size_flop': 'float64',
-            'action_turn': pd.StringDtype(),
-            'bet_size_turn': 'float64',
-            'action_river': pd.StringDtype(),
-            'bet_size_river': 'float64'
+            'result3': pd.Int8Dtype(),
+            'player_id': pd.Int16Dtype(),
+            'playstyle_label': pd.CategoricalDtype([*self.playstyle_labels, UNKNOWN_PLAYSTYLE]),
+            'action_flop': ACTION_DTYPE,
+            'bet_size_flop': 'float32',
+            'action_turn': ACTION_DTYPE,
+            'bet_size_turn': 'float32',
+            'action_river': ACTION_DTYPE,
+            'bet_size_river': 'float32'
         }
         
         # Initialize or load CSV
         self._initialize_csv()
 
+        # Keep the CSV open for appends; rows are buffered and flushed in batches,
+        # and whatever is left is flushed when the model is discarded or at exit
+        self._csv_fh = open(self.data_path, 'a', newline='', encoding='utf-8', buffering=1 << 20)
+        self._csv_cols = list(self.dtypes)  # Column order of every appended row
+        self._writer = csv.writer(self._csv_fh, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+        self._rows_since_flush = 0
+        weakref.finalize(self, self._csv_fh.close)
+
+        # Labels are appended to their own log instead of rewriting the CSV; it is
+        # opened on the first label_opponent call
+        self._label_fh = None
+
     def _initialize_csv(self):
         """Create or load poker_dataset.csv, adding necessary columns."""
         if not os.path.exists(self.data_path):
             self.data = pd.DataFrame(columns=self.dtypes.keys()).astype(self.dtypes)
-            self.data.to_csv(self.data_path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+            self._write_csv()
         else:
             try:
-                # Load CSV with specified dtypes
-                self.data = pd.read_csv(self.data_path, dtype=self.dtypes, keep_default_na=True)
+                # Load CSV with specified dtypes; the results and the categorical columns
+                # are read as text and converted below, since older CSVs hold strength names
+                # rather than codes and values outside the categories must not be dropped
+                text_cols = ['result1', 'result2', 'result3', *_CATEGORY_FALLBACKS]
+                read_dtypes = {**self.dtypes, **dict.fromkeys(text_cols, pd.StringDtype())}
+                self.data = pd.read_csv(self.data_path, dtype=read_dtypes, keep_default_na=True)
                 # Add missing columns
                 for col in self.dtypes:
                     if col not in self.data.columns:
                         self.data[col] = pd.Series(dtype=self.dtypes[col])
                 # Coerce columns to correct types
-                self.data['player_id'] = pd.to_numeric(self.data['player_id'], errors='coerce').astype(pd.Int64Dtype())
-                for col in ['action_flop', 'action_turn', 'action_river', 'hand', 'flop', 'result1', 'turn', 'result2', 'river', 'result3', 'playstyle_label']:
+                self.data['player_id'] = pd.to_numeric(self.data['player_id'], errors='coerce').astype(self.dtypes['player_id'])
+                for col in ['hand', 'flop', 'turn', 'river']:
                     self.data[col] = self.data[col].astype(pd.StringDtype())
-                self.data.to_csv(self.data_path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+                self._coerce_categories(self.data)
+                for col in ['result1', 'result2', 'result3']:
+                    strengths = self.data[col].astype(pd.StringDtype()).str.strip().str.upper()
+                    self.data[col] = strengths.map(_STRENGTH_CODES).astype(self.dtypes[col])
+                self._replay_labels()
+                self._write_csv()
+                self._pending_rows = self.data.to_dict('records')
             except pd.errors.ParserError as e:
                 print(f"Error reading CSV: {e}. Creating new CSV.")
                 self.data = pd.DataFrame(columns=self.dtypes.keys()).astype(self.dtypes)
-                self.data.to_csv(self.data_path, index=False, quoting=csv.QUOTE_NONNUMERIC)
+                self._write_csv()
+
+        # The CSV just written either holds every logged label or is a fresh one with no
+        # rows for them to cover, so the log is done with either way
+        if os.path.exists(self.labels_path):
+            os.remove(self.labels_path)
+
+    def _replay_labels(self):
+        """Apply the labels logged by label_opponent to the rows they covered."""
+        if not os.path.exists(self.labels_path):
+            return
+        with open(self.labels_path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    player_id, playstyle, num_rows = line.rstrip('\n').split(',')
+                    player_id, num_rows = int(player_id), int(num_rows)
+                except ValueError:
+                    continue  # Skip a line cut short or otherwise malformed
+                if playstyle not in self.playstyle_labels:
+                    continue
+                rows = (self.data.index < num_rows) & self.data['player_id'].eq(player_id).fillna(False)
+                self.data.loc[rows, 'playstyle_label'] = playstyle
+
+    def _write_csv(self):
+        """Rewrite the whole CSV from self.data."""
+        # Widen the float32 bet sizes through their shortest text, so they are written
+        # as e.g. 0.14285715 rather than the float32 value's full float64 digits
+        bet_cols = [col for col, dtype in self.dtypes.items() if dtype == 'float32']
+        data = self.data.astype({col: str for col in bet_cols}).astype({col: 'float64' for col in bet_cols})
+        data.to_csv(self.data_path, index=False, quoting=csv.QUOTE_NONNUMERIC, lineterminator='\n')
+
+    def _coerce_categories(self, data):
+        """Cast the action and playstyle columns, mapping unrecognized values to their fallback."""
+        for col, fallback in _CATEGORY_FALLBACKS.items():
+            values = data[col]
+            unknown = values.notna() & ~values.isin(self.dtypes[col].categories)
+            data[col] = values.mask(unknown, fallback).astype(self.dtypes[col])
+
+    def _materialize(self):
+        """Rebuild self.data from the accumulated rows in a single pass."""
+        data = pd.DataFrame.from_records(self._pending_rows, columns=list(self.dtypes))
+        self._coerce_categories(data)
+        self.data = data.astype(self.dtypes)
 
     def _convert_card_to_deuces(self, card):
         """Convert card string (e.g., '♣K') to Deuces format (e.g., 'Kc')."""
-        suit_map = {'♣': 'c', '♥': 'h', '♦': 'd', '♠': 's'}
-        rank = card[1] if card[1] in '23456789TJQKA' else '10' if card[1:3] == '10' else ''
-        suit = suit_map.get(card[0], '')
-        return rank + suit
+        return _RANK_TBL.get(card[1], '') + _SUIT_TBL.get(ord(card[0]), '')
 
     def update_opponent_data(self, player_hand, community_cards, stage, player_action, player_bet, pot_size, player_id):
         """Update opponent hand and action data."""
         # Format card strings to avoid commas
-        hand = ''.join(player_hand).replace(',', '') if player_hand else ''
         flop = ''.join(community_cards[:3]).replace(',', '') if len(community_cards) >= 3 else ''
         turn = ''.join(community_cards[:4]).replace(',', '') if len(community_cards) >= 4 else ''
         river = ''.join(community_cards[:5]).replace(',', '') if len(community_cards) >= 5 else ''
 
-        # Compute hand strength
-        result1 = result2 = result3 = ''
-        if player_hand and len(community_cards) >= 3:
-            try:
-                hole_cards = [Card.new(self._convert_card_to_deuces(c)) for c in player_hand]
-                board = [Card.new(self._convert_card_to_deuces(c)) for c in community_cards]
-                if len(board) >= 3:
-                    rank = self.evaluator.evaluate(board[:3], hole_cards)
-                    result1 = self._rank_to_strength(rank)
-                if len(board) >= 4:
-                    rank = self.evaluator.evaluate(board[:4], hole_cards)
-                    result2 = self._rank_to_strength(rank)
-                if len(board) >= 5:
-                    rank = self.evaluator.evaluate(board[:5], hole_cards)
-                    result3 = self._rank_to_strength(rank)
-            except:
-                pass
+        # Compute hand strength; when the hole cards are hidden there is nothing to
+        # format or evaluate, and the results stay None (0 is the ROYAL FLUSH code)
+        result1 = result2 = result3 = None
+        if not player_hand:
+            hand = ''
+        else:
+            hand = ''.join(player_hand).replace(',', '')
+            if len(community_cards) >= 3:
+                try:
+                    lut = self._card_lut
+                    hole_cards = [lut.get(c) or Card.new(self._convert_card_to_deuces(c)) for c in player_hand]
+                    board = [lut.get(c) or Card.new(self._convert_card_to_deuces(c)) for c in community_cards]
+                    # Card order doesn't affect the rank, so sorted tuples make the cache keys canonical
+                    hole_key = tuple(sorted(hole_cards))
+                    board = tuple(board[:5])
+
+                    # Streets already scored by earlier calls for this hand are reused,
+                    # so only the newly dealt streets are evaluated
+                    seen_board, strengths = self._hand_rank_cache.get(hole_key, ((), ()))
+                    if board[:len(seen_board)] != seen_board:
+                        strengths = ()
+                    for num_cards in range(len(strengths) + 3, len(board) + 1):
+                        rank = _evaluate(tuple(sorted(board[:num_cards])), hole_key)
+                        strengths += (self._rank_to_strength(rank),)
+                    self._hand_rank_cache[hole_key] = (board[:len(strengths) + 2], strengths)
+                    result1, result2, result3 = strengths + (None,) * (3 - len(strengths))
+                except:
+                    pass
 
         # Assign action and bet size based on stage
         action_flop = action_turn = action_river = ''
-        bet_size_flop = bet_size_turn = bet_size_river = 0
-        normalized_bet = player_bet / pot_size if pot_size > 0 else 0
+        bet_size_flop = bet_size_turn = bet_size_river = 0.0
+        normalized_bet = player_bet / pot_size if pot_size > 0 else 0.0
         if stage == 'Flop':
             action_flop = player_action if player_action else ''
             bet_size_flop = normalized_bet
@@ -130,115 +269,109 @@ class OpponentModel:
             'action_river': action_river,
             'bet_size_river': bet_size_river
         }
-        self.opponent_data[player_id].append(new_row)
+        action_codes = [ACTION_CODES.get(action, OTHER_ACTION) if action else NO_ACTION
+                        for action in (action_flop, action_turn, action_river)]
+        bet_sizes = (bet_size_flop, bet_size_turn, bet_size_river)
+
+        # Fold the row into the player's running totals
+        agg = self.opponent_agg[player_id]
+        agg['hands'] += 1
+        for code, bet in zip(action_codes, bet_sizes):
+            if code != NO_ACTION:
+                agg['act'][code] += 1
+            if bet:
+                agg['bet_sum'] += bet
+                agg['bet_n'] += 1
+        if result3 in (PAIR, NOTHING):
+            agg['weak'] += 1
+            if action_river in ('raise', 'bet'):
+                agg['weak_agg'] += 1
+            if action_river:  # Any action means they reached river
+                agg['weak_river'] += 1
         self.opponent_hands_count[player_id] += 1
 
-        # Append to CSV with consistent dtypes, quoting to handle special characters
-        new_row_df = pd.DataFrame([new_row]).astype(self.dtypes)
-        new_row_df.to_csv(self.data_path, mode='a', header=not os.path.exists(self.data_path), index=False, quoting=csv.QUOTE_NONNUMERIC)
-        self.data = pd.concat([self.data, new_row_df], ignore_index=True)
+        # Append to CSV, quoting to handle special characters
+        self._writer.writerow([new_row[col] for col in self._csv_cols])
+        self._rows_since_flush += 1
+        if self._rows_since_flush >= CSV_FLUSH_EVERY:
+            self._flush_csv()
+        self._pending_rows.append(new_row)
+
+    def _flush_csv(self):
+        """Write any buffered CSV rows to disk."""
+        self._csv_fh.flush()
+        self._rows_since_flush = 0
 
     def _rank_to_strength(self, rank):
-        """Convert Deuces rank to hand strength label."""
-        if rank <= 1:
-            return 'ROYAL FLUSH'
-        elif rank <= 10:
-            return 'STRAIGHT FLUSH'
-        elif rank <= 166:
-            return 'FOUR OF A KIND'
-        elif rank <= 322:
-            return 'FULL HOUSE'
-        elif rank <= 1599:
-            return 'FLUSH'
-        elif rank <= 1609:
-            return 'STRAIGHT'
-        elif rank <= 2467:
-            return 'THREE OF A KIND'
-        elif rank <= 3325:
-            return 'TWO PAIR'
-        elif rank <= 6185:
-            return 'PAIR'
-        else:
-            return 'NOTHING'
+        """Convert Deuces rank to a hand strength code (an index into STRENGTH_NAMES)."""
+        return bisect.bisect_left(_STRENGTH_BOUNDS, rank)
 
     def compute_features(self, player_id):
         """Compute features from opponent hand and action data."""
-        if player_id not in self.opponent_data:
+        if player_id not in self.opponent_agg:
             return None
 
-        hands = self.opponent_data[player_id]
-        total_hands = len(hands)
+        # Reuse the last result until another hand is logged for this player
+        hands_count = self.opponent_hands_count[player_id]
+        cached = self._feat_cache.get(player_id)
+        if cached and cached[0] == hands_count:
+            return cached[1]
+
+        agg = self.opponent_agg[player_id]
+        total_hands = agg['hands']
         if total_hands == 0:
             return None
 
-        # Initialize feature dictionary
+        # Compute features from the running totals
+        weak_hand_count = agg['weak'] or 1
         features = {
-            'raise_freq': 0,
-            'call_freq': 0,
-            'fold_freq': 0,
-            'avg_bet_size': 0,
-            'weak_hand_river_freq': 0,
-            'weak_hand_aggressiveness': 0
+            'raise_freq': agg['act'][ACTION_CODES['raise']] / total_hands,
+            'call_freq': agg['act'][ACTION_CODES['call']] / total_hands,
+            'fold_freq': agg['act'][ACTION_CODES['fold']] / total_hands,
+            'avg_bet_size': agg['bet_sum'] / agg['bet_n'] if agg['bet_n'] else 0,
+            'weak_hand_river_freq': agg['weak_river'] / weak_hand_count,
+            'weak_hand_aggressiveness': agg['weak_agg'] / weak_hand_count
         }
 
-        # Count actions and bet sizes
-        action_counts = defaultdict(int)
-        bet_sizes = []
-        weak_hand_river = 0
-        weak_hand_aggressive = 0
-        weak_hand_count = 0
-
-        for hand_data in hands:
-            # Count actions
-            for action in [hand_data['action_flop'], hand_data['action_turn'], hand_data['action_river']]:
-                if action:
-                    action_counts[action] += 1
-            # Collect bet sizes
-            for bet in [hand_data['bet_size_flop'], hand_data['bet_size_turn'], hand_data['bet_size_river']]:
-                if bet:
-                    bet_sizes.append(bet)
-            # Check for weak hands played to river
-            if hand_data['result3'] in ['NOTHING', 'PAIR']:
-                weak_hand_count += 1
-                if hand_data['action_river'] in ['raise', 'bet']:
-                    weak_hand_aggressive += 1
-                if hand_data['action_river']:  # Any action means they reached river
-                    weak_hand_river += 1
-
-        # Compute features
-        features['raise_freq'] = action_counts['raise'] / total_hands
-        features['call_freq'] = action_counts['call'] / total_hands
-        features['fold_freq'] = action_counts['fold'] / total_hands
-        features['avg_bet_size'] = np.mean(bet_sizes) if bet_sizes else 0
-        features['weak_hand_river_freq'] = weak_hand_river / (weak_hand_count or 1)
-        features['weak_hand_aggressiveness'] = weak_hand_aggressive / (weak_hand_count or 1)
-
         self.opponent_features[player_id] = features
+        self._feat_cache[player_id] = (hands_count, features)
         return features
 
     def train_model(self):
         """Train the Random Forest model using labeled data."""
-        labeled_data = self.data[self.data['playstyle_label'].notnull()]
+        if self._trained and not self._label_dirty:
+            return True
+
+        self._materialize()
+        labels = self.data['playstyle_label']
+        labeled_data = self.data[labels.notnull() & (labels != UNKNOWN_PLAYSTYLE)]
         if len(labeled_data) < 10:
             return False
 
-        X, y = [], []
-        for player_id in labeled_data['player_id'].unique():
+        # Each labeled player's most common label, in one grouped pass
+        labels = labeled_data.groupby('player_id', sort=False)['playstyle_label'].agg(lambda s: s.mode().iat[0])
+
+        # One float32 feature row per labeled player that has live data
+        X = np.empty((len(labels), 6), dtype=np.float32)
+        y = []
+        for player_id, label in labels.items():
             features = self.compute_features(player_id)
             if features:
-                X.append([
+                X[len(y)] = (
                     features['raise_freq'], features['call_freq'], features['fold_freq'],
                     features['avg_bet_size'], features['weak_hand_river_freq'],
                     features['weak_hand_aggressiveness']
-                ])
-                player_labels = labeled_data[labeled_data['player_id'] == player_id]['playstyle_label']
-                y.append(player_labels.mode()[0])
+                )
+                y.append(label)
 
-        if not X or not y:
+        if not y:
             return False
+        X = X[:len(y)]
 
         y_encoded = self.label_encoder.fit_transform(y)
         self.model.fit(X, y_encoded)
+        self._label_dirty = False
+        self._trained = True
         return True
 
     def predict_playstyle(self, player_id):
@@ -286,5 +419,21 @@ class OpponentModel:
         if playstyle not in self.playstyle_labels:
             raise ValueError(f"Playstyle must be one of {self.playstyle_labels}")
 
-        self.data.loc[self.data['player_id'] == player_id, 'playstyle_label'] = playstyle
-        self.data.to_csv(self.data_path, index=False, quoting=csv.QUOTE_NONNUMERIC)
\ No newline at end of file
+        for row in self._pending_rows:
+            if row['player_id'] is not pd.NA and row['player_id'] == player_id:
+                row['playstyle_label'] = playstyle
+        self._label_dirty = True
+
+        # Record the label with the number of rows it covers; it is applied to the
+        # CSV the next time the dataset is loaded
+        self._flush_csv()
+        if self._label_fh is None:
+            self._label_fh = open(self.labels_path, 'a', encoding='utf-8', buffering=1 << 16)
+            weakref.finalize(self, self._label_fh.close)
+        self._label_fh.write(f"{int(player_id)},{playstyle},{len(self._pending_rows)}\n")
+        self._label_fh.flush()
+
+@functools.lru_cache(maxsize=None)
+def shared_model():
+    """The one OpponentModel per process, shared by the game loop and the AI modules."""
+    return OpponentModel()